@@ -3,94 +3,127 @@
 
 import frappe
 from frappe.model.document import Document
-from datetime import datetime
+from frappe.utils import now_datetime
+
+# Variant columns read by pricing and validation
+VARIANT_FIELDS = ["product_name", "variant_name", "unit_price", "currency", "stock_quantity", "is_available"]
+
+# Order statuses that move stock
+STOCK_STATUSES = ("Confirmed", "Cancelled")
+
+# Translation table that deletes the ASCII digits
+_STRIP_DIGITS = str.maketrans("", "", "0123456789")
 
 class WhatsAppOrder(Document):
     def before_save(self):
         """Set timestamps before saving"""
-        now = datetime.now()
+        now = now_datetime()
         
         if not self.created_at:
             self.created_at = now
         
         self.updated_at = now
         
-        # Calculate pricing if product variant is selected
-        if self.product_variant:
-            self.update_pricing_from_variant()
+        # Recalculate pricing only when the variant or quantity changed
+        if self.product_variant and not self._pricing_is_current():
+            if self.is_new() or self.has_value_changed("product_variant"):
+                self.update_pricing_from_variant()
+            elif self.has_value_changed("quantity"):
+                # Unit price is already on the order, no need to refetch the variant
+                self.total_price = (self.quantity or 0) * (self.unit_price or 0)
+    
+    @property
+    def variant(self):
+        """Selected product variant's fields, loaded on first access and reloaded only when product_variant changes"""
+        if self.__dict__.get("_variant_key") != self.product_variant:
+            variant = frappe.db.get_value("WhatsApp Product Variant", self.product_variant, VARIANT_FIELDS, as_dict=True)
+            if not variant:
+                frappe.throw(f"Product variant '{self.product_variant}' not found")
+            
+            self.__dict__["_variant_doc"] = variant
+            self.__dict__["_variant_key"] = self.product_variant
+        return self.__dict__["_variant_doc"]
+    
+    def _pricing_is_current(self):
+        """Whether pricing was already applied for the current variant and quantity"""
+        return getattr(self, "_pricing_applied", None) == (self.product_variant, self.quantity)
     
     def update_pricing_from_variant(self):
         """Update pricing fields from selected product variant"""
-        try:
-            variant_doc = frappe.get_doc("WhatsApp Product Variant", self.product_variant)
-            
-            # Update product details
-            self.item = variant_doc.product_name
-            self.variant_name = variant_doc.variant_name
-            self.unit_price = variant_doc.price
-            self.currency = variant_doc.currency
-            
-            # Calculate total price
-            if self.quantity and self.unit_price:
-                self.total_price = self.quantity * self.unit_price
-            else:
-                self.total_price = 0
-                
-        except frappe.DoesNotExistError:
-            frappe.throw(f"Product variant '{self.product_variant}' not found")
+        variant = self.variant
+        
+        # Update product details
+        self.item = variant.product_name
+        self.variant_name = variant.variant_name
+        self.unit_price = variant.unit_price
+        self.currency = variant.currency
+        
+        # Calculate total price
+        if self.quantity and self.unit_price:
+            self.total_price = self.quantity * self.unit_price
+        else:
+            self.total_price = 0
+        
+        # before_insert and before_save both run on create; price only once
+        self._pricing_applied = (self.product_variant, self.quantity)
     
     def on_update(self):
         """Called after document is updated"""
-        # Update stock if order status changes
-        if self.has_value_changed("order_status"):
+        # Update stock if order status changes to one that moves stock
+        if self.order_status in STOCK_STATUSES and self.has_value_changed("order_status"):
             self.update_stock_on_status_change()
     
     def update_stock_on_status_change(self):
         """Update stock based on order status changes"""
-        try:
-            variant_doc = frappe.get_doc("WhatsApp Product Variant", self.product_variant)
-            
-            # Reduce stock when order is confirmed
-            if self.order_status == "Confirmed":
-                if variant_doc.stock_quantity >= self.quantity:
-                    variant_doc.update_stock(-self.quantity)
-                else:
-                    frappe.throw(f"Insufficient stock. Available: {variant_doc.stock_quantity}")
-            
-            # Restore stock if order is cancelled
-            elif self.order_status == "Cancelled":
-                variant_doc.update_stock(self.quantity)
-                
-        except frappe.DoesNotExistError:
+        if self.order_status not in STOCK_STATUSES or not self.product_variant or not self.quantity:
+            return
+        
+        # Read the live stock level, locked until commit, rather than the memoized variant
+        stock_quantity = frappe.db.get_value("WhatsApp Product Variant", self.product_variant, "stock_quantity", for_update=True)
+        if stock_quantity is None:
             frappe.logger().error(f"Product variant '{self.product_variant}' not found for stock update")
+            return
+        
+        # Reduce stock when order is confirmed
+        if self.order_status == "Confirmed":
+            if stock_quantity < self.quantity:
+                frappe.throw(f"Insufficient stock. Available: {stock_quantity}")
+            new_quantity = stock_quantity - self.quantity
+        
+        # Restore stock if order is cancelled
+        else:
+            new_quantity = stock_quantity + self.quantity
+        
+        # Write the one column directly instead of saving the whole variant document
+        frappe.db.set_value("WhatsApp Product Variant", self.product_variant, "stock_quantity", new_quantity, update_modified=False)
     
     def validate(self):
         """Validate the document"""
         # Validate phone number format (basic validation)
         if self.phone_number:
-            phone_digits = ''.join(filter(str.isdigit, self.phone_number))
-            if len(phone_digits) < 10:
+            # Whatever translate removed were the digits
+            digit_count = len(self.phone_number) - len(self.phone_number.translate(_STRIP_DIGITS))
+            if digit_count < 10:
                 frappe.throw("Please enter a valid phone number")
         
         # Validate quantity
         if self.quantity and self.quantity <= 0:
             frappe.throw("Quantity must be greater than 0")
         
-        # Validate product variant
-        if self.product_variant:
-            try:
-                variant_doc = frappe.get_doc("WhatsApp Product Variant", self.product_variant)
-                
-                # Check if variant is available
-                if not variant_doc.is_available:
-                    frappe.throw(f"Product variant '{variant_doc.variant_name}' is not available")
-                
-                # Check stock availability
-                if variant_doc.stock_quantity < self.quantity:
-                    frappe.throw(f"Insufficient stock. Available: {variant_doc.stock_quantity}, Required: {self.quantity}")
-                    
-            except frappe.DoesNotExistError:
-                frappe.throw(f"Product variant '{self.product_variant}' not found")
+        # Validate product variant; availability and stock only need rechecking when
+        # the order is new or the variant or quantity changed, not on status-only edits
+        if self.product_variant and (
+            self.is_new() or self.has_value_changed("product_variant") or self.has_value_changed("quantity")
+        ):
+            variant = self.variant
+            
+            # Check if variant is available
+            if not variant.is_available:
+                frappe.throw(f"Product variant '{variant.variant_name}' is not available")
+            
+            # Check stock availability
+            if variant.stock_quantity < self.quantity:
+                frappe.throw(f"Insufficient stock. Available: {variant.stock_quantity}, Required: {self.quantity}")
     
     def before_insert(self):
         """Set initial values before inserting"""
@@ -98,7 +131,7 @@ class WhatsAppOrder(Document):
             self.order_status = "Pending"
         
         # Set pricing from variant if available
-        if self.product_variant:
+        if self.product_variant and not self._pricing_is_current():
             self.update_pricing_from_variant()
     
     def get_display_name(self):
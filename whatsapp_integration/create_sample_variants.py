@@ -4,17 +4,32 @@ Script to create sample WhatsApp Product Variants for testing
 """
 
 import frappe
+from frappe.utils import now_datetime
+from whatsapp_integration.whatsapp_integration.api import clear_product_variant_caches
 
-def create_variant(product_name, variant_name, variant_type, unit_price, currency, stock_quantity, is_available=1, description=""):
-    """Create a product variant"""
+# Write all new seed rows with a single multi-row INSERT. Set to False to fall
+# back to one db_insert() per row.
+USE_BULK_INSERT = True
+
+BULK_INSERT_FIELDS = (
+    "name", "product_name", "variant_name", "variant_type", "unit_price", "currency",
+    "stock_quantity", "is_available", "description", "creation", "modified", "owner", "modified_by"
+)
+
+def create_variant(existing, product_name, variant_name, variant_type, unit_price, currency, stock_quantity, is_available=1, description="", pending=None):
+    """Create a product variant unless its name is in the `existing` set.
+
+    When a `pending` list is given the row is queued there for bulk insertion instead.
+    """
     try:
         # Check if variant already exists
-        if frappe.db.exists("WhatsApp Product Variant", variant_name):
+        if variant_name in existing:
             print(f"Variant '{variant_name}' already exists. Skipping creation.")
             return
 
-        doc = frappe.get_doc({
-            "doctype": "WhatsApp Product Variant",
+        now = now_datetime()
+        values = {
+            "name": variant_name,  # autoname is field:variant_name
             "product_name": product_name,
             "variant_name": variant_name,
             "variant_type": variant_type,
@@ -22,13 +37,30 @@ def create_variant(product_name, variant_name, variant_type, unit_price, currenc
             "currency": currency,
             "stock_quantity": stock_quantity,
             "is_available": is_available,
-            "description": description
-        })
-        doc.insert(ignore_permissions=True)
-        frappe.db.commit()
+            "description": description,
+            "creation": now,
+            "modified": now,
+            "owner": frappe.session.user,
+            "modified_by": frappe.session.user
+        }
+        
+        if pending is not None:
+            pending.append(tuple(values[field] for field in BULK_INSERT_FIELDS))
+            existing.add(variant_name)
+            return
+        
+        # Savepoint per row so a bad row is undone without losing the rest of the batch
+        frappe.db.savepoint("variant")
+        try:
+            # Seed rows are known-good, so skip the validation hooks of insert()
+            frappe.get_doc({"doctype": "WhatsApp Product Variant", **values}).db_insert()
+        except Exception:
+            frappe.db.rollback(save_point="variant")
+            raise
+        
+        existing.add(variant_name)
         print(f"Created variant: {variant_name} ({product_name})")
     except Exception as e:
-        frappe.db.rollback()
         print(f"Error creating variant {variant_name}: {e}")
 
 def create_sample_variants():
@@ -37,29 +69,47 @@ def create_sample_variants():
     
     print("Creating sample WhatsApp Product Variants...")
     
+    # One query for all existing names instead of an exists() check per row
+    existing = set(frappe.get_all("WhatsApp Product Variant", pluck="name"))
+    pending = [] if USE_BULK_INSERT else None
+    
     # Pizza Variants
-    create_variant("Pizza Margherita", "Pizza Margherita - Small", "Size", 800, "KES", 50, description="Classic Margherita, small size")
-    create_variant("Pizza Margherita", "Pizza Margherita - Medium", "Size", 1200, "KES", 75, description="Classic Margherita, medium size")
-    create_variant("Pizza Margherita", "Pizza Margherita - Large", "Size", 1600, "KES", 100, description="Classic Margherita, large size")
+    create_variant(existing, "Pizza Margherita", "Pizza Margherita - Small", "Size", 800, "KES", 50, description="Classic Margherita, small size", pending=pending)
+    create_variant(existing, "Pizza Margherita", "Pizza Margherita - Medium", "Size", 1200, "KES", 75, description="Classic Margherita, medium size", pending=pending)
+    create_variant(existing, "Pizza Margherita", "Pizza Margherita - Large", "Size", 1600, "KES", 100, description="Classic Margherita, large size", pending=pending)
     
-    create_variant("Pizza Pepperoni", "Pizza Pepperoni - Small", "Size", 900, "KES", 40, description="Spicy Pepperoni, small size")
-    create_variant("Pizza Pepperoni", "Pizza Pepperoni - Medium", "Size", 1350, "KES", 60, description="Spicy Pepperoni, medium size")
-    create_variant("Pizza Pepperoni", "Pizza Pepperoni - Large", "Size", 1800, "KES", 80, description="Spicy Pepperoni, large size")
+    create_variant(existing, "Pizza Pepperoni", "Pizza Pepperoni - Small", "Size", 900, "KES", 40, description="Spicy Pepperoni, small size", pending=pending)
+    create_variant(existing, "Pizza Pepperoni", "Pizza Pepperoni - Medium", "Size", 1350, "KES", 60, description="Spicy Pepperoni, medium size", pending=pending)
+    create_variant(existing, "Pizza Pepperoni", "Pizza Pepperoni - Large", "Size", 1800, "KES", 80, description="Spicy Pepperoni, large size", pending=pending)
     
     # Burger Variants
-    create_variant("Chicken Burger", "Chicken Burger - Single", "Size", 450, "KES", 120, description="Single patty chicken burger")
-    create_variant("Chicken Burger", "Chicken Burger - Double", "Size", 650, "KES", 80, description="Double patty chicken burger")
+    create_variant(existing, "Chicken Burger", "Chicken Burger - Single", "Size", 450, "KES", 120, description="Single patty chicken burger", pending=pending)
+    create_variant(existing, "Chicken Burger", "Chicken Burger - Double", "Size", 650, "KES", 80, description="Double patty chicken burger", pending=pending)
     
-    create_variant("Beef Burger", "Beef Burger - Single", "Size", 500, "KES", 100, description="Single patty beef burger")
-    create_variant("Beef Burger", "Beef Burger - Double", "Size", 750, "KES", 70, description="Double patty beef burger")
+    create_variant(existing, "Beef Burger", "Beef Burger - Single", "Size", 500, "KES", 100, description="Single patty beef burger", pending=pending)
+    create_variant(existing, "Beef Burger", "Beef Burger - Double", "Size", 750, "KES", 70, description="Double patty beef burger", pending=pending)
     
     # Drinks Variants
-    create_variant("Coca Cola", "Coca Cola - Small", "Size", 80, "KES", 200, description="Refreshing Coca Cola, small")
-    create_variant("Coca Cola", "Coca Cola - Medium", "Size", 120, "KES", 150, description="Refreshing Coca Cola, medium")
-    create_variant("Coca Cola", "Coca Cola - Large", "Size", 150, "KES", 100, description="Refreshing Coca Cola, large")
+    create_variant(existing, "Coca Cola", "Coca Cola - Small", "Size", 80, "KES", 200, description="Refreshing Coca Cola, small", pending=pending)
+    create_variant(existing, "Coca Cola", "Coca Cola - Medium", "Size", 120, "KES", 150, description="Refreshing Coca Cola, medium", pending=pending)
+    create_variant(existing, "Coca Cola", "Coca Cola - Large", "Size", 150, "KES", 100, description="Refreshing Coca Cola, large", pending=pending)
+    
+    create_variant(existing, "Orange Juice", "Orange Juice - Small", "Size", 100, "KES", 90, description="Fresh orange juice, small", pending=pending)
+    create_variant(existing, "Orange Juice", "Orange Juice - Large", "Size", 180, "KES", 60, description="Fresh orange juice, large", pending=pending)
+    
+    # Everything above runs in one transaction, committed once here
+    try:
+        if pending:
+            frappe.db.bulk_insert("WhatsApp Product Variant", BULK_INSERT_FIELDS, pending)
+            print(f"Created {len(pending)} variants in one batch")
+        
+        frappe.db.commit()
+    except Exception:
+        frappe.db.rollback()
+        raise
     
-    create_variant("Orange Juice", "Orange Juice - Small", "Size", 100, "KES", 90, description="Fresh orange juice, small")
-    create_variant("Orange Juice", "Orange Juice - Large", "Size", 180, "KES", 60, description="Fresh orange juice, large")
+    # Rows were inserted without controller hooks, so drop the cached menus here
+    clear_product_variant_caches()
     
     print("\nSample WhatsApp Product Variants creation complete.")
 
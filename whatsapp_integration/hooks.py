@@ -108,6 +108,25 @@ app_license = "mit"
 #	}
 # }
 
+doc_events = {
+	"WhatsApp Order": {
+		"on_update": "whatsapp_integration.whatsapp_integration.api.clear_order_caches",
+		"on_trash": "whatsapp_integration.whatsapp_integration.api.clear_order_caches"
+	},
+	"Customer": {
+		"on_update": "whatsapp_integration.whatsapp_integration.api.clear_customer_cache",
+		"on_trash": "whatsapp_integration.whatsapp_integration.api.clear_customer_cache"
+	},
+	"Item": {
+		"on_update": "whatsapp_integration.whatsapp_integration.api.clear_available_items_cache",
+		"on_trash": "whatsapp_integration.whatsapp_integration.api.clear_available_items_cache"
+	},
+	"WhatsApp Product Variant": {
+		"on_update": "whatsapp_integration.whatsapp_integration.api.clear_product_variant_caches",
+		"on_trash": "whatsapp_integration.whatsapp_integration.api.clear_product_variant_caches"
+	}
+}
+
 # Scheduled Tasks
 # ---------------
 
@@ -230,11 +249,13 @@ override_whitelisted_methods = {
 	"whatsapp_integration.api.get_orders_by_date": "whatsapp_integration.api.get_orders_by_date",
 	"whatsapp_integration.api.get_order_products": "whatsapp_integration.api.get_order_products",
 	"whatsapp_integration.api.get_daily_order_summary": "whatsapp_integration.api.get_daily_order_summary",
+	"whatsapp_integration.api.get_daily_order_totals": "whatsapp_integration.api.get_daily_order_totals",
 	
 	# Product and Variant Management APIs
 	"whatsapp_integration.api.get_product_variants": "whatsapp_integration.api.get_product_variants",
 	"whatsapp_integration.api.get_products_menu": "whatsapp_integration.api.get_products_menu",
 	"whatsapp_integration.api.get_variant_details": "whatsapp_integration.api.get_variant_details",
 	"whatsapp_integration.api.create_order_with_variant": "whatsapp_integration.api.create_order_with_variant",
+	"whatsapp_integration.api.create_orders_bulk": "whatsapp_integration.api.create_orders_bulk",
 	"whatsapp_integration.api.get_order_with_pricing": "whatsapp_integration.api.get_order_with_pricing"
 }
\ No newline at end of file
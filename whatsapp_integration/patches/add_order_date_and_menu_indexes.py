@@ -0,0 +1,9 @@
+import frappe
+
+
+def execute():
+	"""Index the date range and menu queries"""
+	# Day ranges on creation, with order_status for the per-status counts
+	frappe.db.add_index("WhatsApp Order", ["creation", "order_status"])
+	# Available variants in menu order
+	frappe.db.add_index("WhatsApp Product Variant", ["is_available", "product_name", "unit_price"])
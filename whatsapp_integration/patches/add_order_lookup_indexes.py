@@ -0,0 +1,8 @@
+import frappe
+
+
+def execute():
+	"""Index the columns the conversation and order lookup APIs filter on"""
+	frappe.db.add_index("WhatsApp Order", ["phone_number"])
+	frappe.db.add_index("WhatsApp Order", ["order_status", "creation"])
+	frappe.db.add_index("WhatsApp Session", ["phone_number", "status"])
@@ -0,0 +1,9 @@
+import frappe
+
+
+def execute():
+	"""Drop the created_at/updated_at columns; creation and modified carry the same timestamps"""
+	for doctype in ("WhatsApp Order", "WhatsApp Session"):
+		for column in ("created_at", "updated_at"):
+			if frappe.db.has_column(doctype, column):
+				frappe.db.sql_ddl(f"ALTER TABLE `tab{doctype}` DROP COLUMN `{column}`")
@@ -4,31 +4,56 @@ Test script for Date and Product APIs
 This demonstrates the functionality even without the custom API endpoints
 """
 
+import sys
 import requests
+from requests.adapters import HTTPAdapter
 import json
+from collections import defaultdict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 # Configuration
 BASE_URL = "http://totalwhatsapporder.local:8002"
 AUTH_TOKEN = "a83482f9033d39e:f1c1ab82164f22a"
+TEST_DATE = "2025-09-24"
 
-def test_orders_by_date():
+# Query parameters encoded once at import
+ORDERS_FILTER = json.dumps([["creation", "between", [f"{TEST_DATE} 00:00:00", f"{TEST_DATE} 23:59:59"]]])
+ORDER_FIELDS = json.dumps(["name", "customer_name", "item", "quantity", "order_status", "creation", "phone_number"])
+
+def make_session():
+    """Create an authenticated HTTP session that keeps connections alive between calls"""
+    session = requests.Session()
+    session.headers.update({"Authorization": f"token {AUTH_TOKEN}"})
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@lru_cache(maxsize=None)
+def fetch_daily_totals(session, date):
+    """Fetch grouped order totals for a date, once per session and date"""
+    url = f"{BASE_URL}/api/method/whatsapp_integration.api.get_daily_order_totals"
+    response = session.get(url, params={"date": date})
+    response.raise_for_status()
+    return response.json().get("message", {}).get("totals", [])
+
+def test_orders_by_date(session):
     """Test getting orders by date using direct resource API"""
     print("🗓️  Testing: Get Orders by Date")
     print("=" * 50)
     
     # Get orders for today
-    today = "2025-09-24"
+    today = TEST_DATE
     url = f"{BASE_URL}/api/resource/WhatsApp%20Order"
     params = {
-        "filters": f'[["creation","between",["{today} 00:00:00","{today} 23:59:59"]]]',
-        "fields": '["name","customer_name","item","quantity","order_status","creation","phone_number"]'
+        "filters": ORDERS_FILTER,
+        "fields": ORDER_FIELDS
     }
     
-    headers = {"Authorization": f"token {AUTH_TOKEN}"}
-    
     try:
-        response = requests.get(url, params=params, headers=headers)
+        response = session.get(url, params=params)
         response.raise_for_status()
         
         data = response.json()
@@ -37,15 +62,22 @@ def test_orders_by_date():
         print(f"📅 Found {len(orders)} orders for {today}")
         print("-" * 50)
         
+        # Build the whole listing and write it in one call
+        lines = []
+        separator = "-" * 30
         for order in orders:
-            print(f"📦 Order: {order.get('name', 'N/A')}")
-            print(f"   Customer: {order.get('customer_name', 'N/A')}")
-            print(f"   Phone: {order.get('phone_number', 'N/A')}")
-            print(f"   Item: {order.get('item', 'N/A')}")
-            print(f"   Quantity: {order.get('quantity', 'N/A')}")
-            print(f"   Status: {order.get('order_status', 'N/A')}")
-            print(f"   Created: {order.get('creation', 'N/A')}")
-            print("-" * 30)
+            get = order.get
+            lines.append(f"📦 Order: {get('name', 'N/A')}")
+            lines.append(f"   Customer: {get('customer_name', 'N/A')}")
+            lines.append(f"   Phone: {get('phone_number', 'N/A')}")
+            lines.append(f"   Item: {get('item', 'N/A')}")
+            lines.append(f"   Quantity: {get('quantity', 'N/A')}")
+            lines.append(f"   Status: {get('order_status', 'N/A')}")
+            lines.append(f"   Created: {get('creation', 'N/A')}")
+            lines.append(separator)
+        
+        if lines:
+            sys.stdout.write("\n".join(lines) + "\n")
         
         return orders
         
@@ -53,16 +85,15 @@ def test_orders_by_date():
         print(f"❌ Error: {str(e)}")
         return []
 
-def test_order_products(order_id):
+def test_order_products(session, order_id):
     """Test getting products for a specific order"""
     print(f"\n🛍️  Testing: Get Products for Order {order_id}")
     print("=" * 50)
     
     url = f"{BASE_URL}/api/resource/WhatsApp%20Order/{order_id}"
-    headers = {"Authorization": f"token {AUTH_TOKEN}"}
     
     try:
-        response = requests.get(url, headers=headers)
+        response = session.get(url)
         response.raise_for_status()
         
         order = response.json().get("data", {})
@@ -99,58 +130,37 @@ def test_order_products(order_id):
         print(f"❌ Error: {str(e)}")
         return None
 
-def test_daily_summary():
+def test_daily_summary(session):
     """Test getting daily order summary"""
     print(f"\n📊 Testing: Daily Order Summary")
     print("=" * 50)
     
-    # Get all orders for today
-    today = "2025-09-24"
-    url = f"{BASE_URL}/api/resource/WhatsApp%20Order"
-    params = {
-        "filters": f'[["creation","between",["{today} 00:00:00","{today} 23:59:59"]]]',
-        "fields": '["name","item","quantity","order_status","creation"]'
-    }
-    
-    headers = {"Authorization": f"token {AUTH_TOKEN}"}
+    # Grouped totals for today, aggregated on the server
+    today = TEST_DATE
     
     try:
-        response = requests.get(url, params=params, headers=headers)
-        response.raise_for_status()
+        totals = fetch_daily_totals(session, today)
         
-        data = response.json()
-        orders = data.get("data", [])
-        
-        # Calculate summary
-        product_summary = {}
-        status_summary = {}
-        total_orders = len(orders)
+        # Fold the (item, status) rows into product and status summaries
+        product_summary = defaultdict(lambda: {"item_name": None, "total_quantity": 0, "order_count": 0})
+        status_summary = defaultdict(int)
+        total_orders = 0
         total_quantity = 0
         
-        for order in orders:
-            # Product summary
-            item = order.get('item', 'Unknown')
-            if item not in product_summary:
-                product_summary[item] = {
-                    "item_name": item,
-                    "total_quantity": 0,
-                    "order_count": 0,
-                    "orders": []
-                }
+        for row in totals:
+            get = row.get
+            item = get('item') or 'Unknown'
+            order_count = int(get('order_count') or 0)
+            quantity = int(get('total_quantity') or 0)
             
-            quantity = int(order.get('quantity', 0))
-            product_summary[item]["total_quantity"] += quantity
-            product_summary[item]["order_count"] += 1
-            product_summary[item]["orders"].append({
-                "order_id": order.get('name'),
-                "quantity": quantity,
-                "status": order.get('order_status')
-            })
+            product = product_summary[item]
+            product["item_name"] = item
+            product["total_quantity"] += quantity
+            product["order_count"] += order_count
             
-            # Status summary
-            status = order.get('order_status', 'Unknown')
-            status_summary[status] = status_summary.get(status, 0) + 1
+            status_summary[get('order_status') or 'Unknown'] += order_count
             
+            total_orders += order_count
             total_quantity += quantity
         
         print(f"📅 Date: {today}")
@@ -172,7 +182,7 @@ def test_daily_summary():
             "summary": {
                 "total_orders": total_orders,
                 "total_quantity": total_quantity,
-                "status_breakdown": status_summary
+                "status_breakdown": dict(status_summary)
             },
             "products": list(product_summary.values())
         }
@@ -188,16 +198,21 @@ def main():
     print("Testing date filtering and product retrieval functionality")
     print("=" * 60)
     
+    # One keep-alive session shared by every test call
+    session = make_session()
+    
     # Test 1: Get orders by date
-    orders = test_orders_by_date()
+    orders = test_orders_by_date(session)
     
     if orders:
-        # Test 2: Get products for first order
+        # Tests 2 and 3 are independent, so run them concurrently
         first_order = orders[0]
-        test_order_products(first_order.get('name'))
-        
-        # Test 3: Daily summary
-        test_daily_summary()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            # Test 2: Get products for first order
+            executor.submit(test_order_products, session, first_order.get('name'))
+            
+            # Test 3: Daily summary
+            executor.submit(test_daily_summary, session)
     
     print("\n" + "=" * 60)
     print("✅ All tests completed!")
@@ -7,10 +7,25 @@ Run this after setting up ngrok to test the webhook endpoint
 import requests
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(data):
+    """Serialize a payload to JSON bytes, using orjson when it is installed"""
+    return orjson.dumps(data) if orjson else json.dumps(data).encode()
+
+
+def loads(content):
+    """Parse a JSON response body, using orjson when it is installed"""
+    return orjson.loads(content) if orjson else json.loads(content)
+
 # Replace with your ngrok URL
 WEBHOOK_URL = "http://localhost:8000/api/method/whatsapp_integration.api.whatsapp_webhook"
 
-def test_webhook_verification():
+def test_webhook_verification(session):
     """Test webhook verification (GET request)"""
     print("Testing webhook verification...")
     
@@ -20,7 +35,7 @@ def test_webhook_verification():
         "hub.challenge": "test_challenge_123"
     }
     
-    response = requests.get(WEBHOOK_URL, params=params)
+    response = session.get(WEBHOOK_URL, params=params)
     print(f"Status: {response.status_code}")
     print(f"Response: {response.text}")
     
@@ -29,7 +44,7 @@ def test_webhook_verification():
     else:
         print("❌ Webhook verification failed!")
 
-def test_webhook_message():
+def test_webhook_message(session):
     """Test webhook with sample WhatsApp message"""
     print("\nTesting webhook with sample message...")
     
@@ -66,10 +81,13 @@ def test_webhook_message():
     }
     
     headers = {"Content-Type": "application/json"}
-    response = requests.post(WEBHOOK_URL, json=sample_message, headers=headers)
+    response = session.post(WEBHOOK_URL, data=dumps(sample_message), headers=headers)
     
     print(f"Status: {response.status_code}")
-    print(f"Response: {response.text}")
+    try:
+        print(f"Response: {loads(response.content)}")
+    except ValueError:
+        print(f"Response: {response.text}")
     
     if response.status_code == 200:
         print("✅ Webhook message processing working!")
@@ -80,11 +98,14 @@ if __name__ == "__main__":
     print("WhatsApp Webhook Test")
     print("=" * 30)
     
+    # Reuse one connection for both requests
+    session = requests.Session()
+    
     # Test verification first
-    test_webhook_verification()
+    test_webhook_verification(session)
     
     # Test message processing
-    test_webhook_message()
+    test_webhook_message(session)
     
     print("\n" + "=" * 30)
     print("Test completed!")
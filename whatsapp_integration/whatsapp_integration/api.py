@@ -3,11 +3,117 @@ WhatsApp Integration API
 Handles incoming WhatsApp messages and creates orders in ERPNext
 """
 
+import dataclasses
 import frappe
+import functools
+import itertools
+import operator
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import re
-from datetime import datetime
+from collections import defaultdict
+import datetime
+from frappe.utils import getdate, now_datetime
+from frappe.utils.response import json_handler
+from werkzeug.wrappers import Response
+from whatsapp_integration.utils import insert_order_row
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+# App logger bound once at import. Import can happen before a site is set up, so it
+# writes to the bench-wide logs/whatsapp_integration.log rather than a per-site file.
+logger = frappe.logger("whatsapp_integration", allow_site=False)
+
+# Seconds a day's grouped order totals stay cached
+DAILY_TOTALS_CACHE_TTL = 60
+
+# Default and largest page sizes for get_orders_by_date
+ORDERS_PAGE_LENGTH = 100
+MAX_ORDERS_PAGE_LENGTH = 500
+
+# Most orders returned by get_daily_order_summary when include_orders is set
+DAILY_SUMMARY_ORDER_LIMIT = 500
+
+# Seconds the menu shown to a customer stays cached for their reply
+MENU_CACHE_TTL = 300
+
+# Cache key and lifetime for the sellable item list behind the menu
+AVAILABLE_ITEMS_CACHE_KEY = "whatsapp_integration:available_items"
+AVAILABLE_ITEMS_CACHE_TTL = 300
+
+# Cache keys and lifetime for the product variant endpoints
+PRODUCTS_MENU_CACHE_KEY = "whatsapp_integration:products_menu"
+PRODUCT_VARIANTS_CACHE_KEY = "whatsapp_integration:product_variants"
+PRODUCT_VARIANTS_CACHE_TTL = 60
+
+# Redis key holding the version token bumped whenever a variant changes
+VARIANT_VERSION_CACHE_KEY = "whatsapp_integration:variant_version"
+
+# Order fields cached per phone number for the customer order endpoints
+PHONE_ORDER_FIELDS = ["name", "customer_name", "phone_number", "item", "quantity",
+                      "delivery_address", "order_status", "creation as created_at", "modified as updated_at"]
+PHONE_ORDERS_CACHE_TTL = 30
+
+# Most orders get_order_history returns
+MAX_ORDER_HISTORY = 100
+
+# Redis hash mapping phone numbers to Customer names
+CUSTOMER_CACHE_KEY = "whatsapp_integration:customer"
+
+# Customer-facing description of each order status
+STATUS_MESSAGES = {
+    "Pending": "Your order is being processed",
+    "Confirmed": "Order confirmed! We're preparing your order",
+    "Preparing": "Your order is being prepared",
+    "Out for Delivery": "Your order is on its way!",
+    "Delivered": "Order delivered successfully!",
+    "Cancelled": "Order has been cancelled"
+}
+
+# WhatsApp message sent when an order's status changes
+STATUS_UPDATE_TEMPLATE = """📱 Order Update
+
+Order: {order_id}
+Status: {status}
+Message: {status_message}
+
+Thank you for choosing us! 🎉"""
+
+# Keywords recognised in incoming messages
+START_COMMANDS = frozenset({"order", "menu", "start"})
+CANCEL_COMMANDS = frozenset({"cancel", "stop", "quit"})
+CONFIRM_REPLIES = frozenset({"yes", "y", "confirm"})
+DECLINE_REPLIES = frozenset({"no", "n", "cancel"})
+
+def make_graph_client():
+    """HTTP client for the Graph API: HTTP/2 via httpx when httpx and h2 are installed,
+    otherwise a keep-alive requests session"""
+    if httpx:
+        try:
+            return httpx.Client(
+                http2=True,
+                timeout=10,
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            )
+        except ImportError:
+            pass  # h2 isn't installed
+    
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=50))
+    return session
+
+
+# Shared by every send in this worker so connections are reused
+_WA_CLIENT = make_graph_client()
 
 @frappe.whitelist(allow_guest=True)
 def whatsapp_webhook():
@@ -32,8 +138,12 @@ def whatsapp_webhook():
 
     # POST - handle incoming messages
     try:
-        data = frappe.request.get_json()
-        frappe.logger().info(f"Incoming WhatsApp webhook: {json.dumps(data, indent=2)}")
+        body = frappe.request.get_data()
+        data = orjson.loads(body) if orjson else json.loads(body)
+        
+        # Dumping the payload is only worth its cost while developing
+        if frappe.conf.developer_mode:
+            logger.debug(f"Incoming WhatsApp webhook: {json.dumps(data, indent=2)}")
         
         # Parse WhatsApp webhook format
         if "entry" in data:
@@ -46,7 +156,7 @@ def whatsapp_webhook():
                         process_incoming_message(message)
                         
     except Exception as e:
-        frappe.logger().error(f"Error processing WhatsApp webhook: {str(e)}")
+        logger.error(f"Error processing WhatsApp webhook: {str(e)}")
     
     return {"status": "received"}
 
@@ -70,7 +180,7 @@ def process_incoming_message(message):
     if not user_text:
         return
     
-    frappe.logger().info(f"Message from {from_phone}: {user_text}")
+    logger.info(f"Message from {from_phone}: {user_text}")
     
     # Get or create session
     session = get_or_create_session(from_phone)
@@ -78,28 +188,65 @@ def process_incoming_message(message):
     # Handle different commands
     user_text_lower = user_text.lower()
     
-    if user_text_lower in ["order", "menu", "start"]:
+    if user_text_lower in START_COMMANDS:
         start_order_flow(from_phone, session)
-    elif user_text_lower in ["cancel", "stop", "quit"]:
-        cancel_order(from_phone, session)
-    elif session.get("status") == "awaiting_item":
-        handle_item_selection(from_phone, session, user_text)
-    elif session.get("status") == "awaiting_quantity":
-        handle_quantity_selection(from_phone, session, user_text)
-    elif session.get("status") == "awaiting_address":
-        handle_address_input(from_phone, session, user_text)
-    elif session.get("status") == "awaiting_confirmation":
-        handle_confirmation(from_phone, session, user_text)
+    elif user_text_lower in CANCEL_COMMANDS:
+        cancel_session_order(from_phone, session)
+    elif session.get("status") == "active" and (handler := STEP_HANDLERS.get(session.get("current_step"))):
+        handler(from_phone, session, user_text)
     else:
         send_whatsapp_message(from_phone, "Hi! Type 'order' to start placing an order. Type 'cancel' to stop anytime.")
 
 
+@dataclasses.dataclass(slots=True)
+class ConversationSession:
+    """WhatsApp Session fields the conversation reads and writes, loaded without building a Document"""
+    name: str
+    phone_number: str
+    status: str = "active"
+    current_step: str = "awaiting_command"
+    item_selected: str | None = None
+    item_name: str | None = None
+    item_rate: float | None = 0
+    quantity: int | None = 0
+    delivery_address: str | None = None
+    _changed: set = dataclasses.field(default_factory=set, init=False, repr=False, compare=False)
+    
+    def __setattr__(self, key, value):
+        object.__setattr__(self, key, value)
+        # _changed doesn't exist yet while __init__ assigns the loaded values
+        if key != "_changed" and hasattr(self, "_changed"):
+            self._changed.add(key)
+    
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+    
+    def update(self, values):
+        """Mirror values that were just written to the database, skipping non-session columns"""
+        for key, value in values.items():
+            if key in SESSION_FIELDS:
+                object.__setattr__(self, key, value)
+    
+    def save(self, ignore_permissions=False):
+        """Write the fields assigned since loading back with a single UPDATE"""
+        if self._changed:
+            update_session(self, {key: getattr(self, key) for key in self._changed})
+
+
+# WhatsApp Session columns the conversation handlers read and write
+SESSION_FIELDS = [f.name for f in dataclasses.fields(ConversationSession) if f.init]
+
+
 def get_or_create_session(from_phone):
     """Get existing session or create new one"""
-    session_doc = frappe.db.get_value("WhatsApp Session", {"phone_number": from_phone, "status": ["!=", "completed"]}, "name")
+    session = frappe.db.get_value("WhatsApp Session",
+        {"phone_number": from_phone, "status": ["!=", "completed"]},
+        SESSION_FIELDS,
+        as_dict=True
+    )
     
-    if session_doc:
-        return frappe.get_doc("WhatsApp Session", session_doc)
+    if session:
+        return ConversationSession(**session)
     else:
         # Create new session
         session = frappe.get_doc({
@@ -109,91 +256,147 @@ def get_or_create_session(from_phone):
             "current_step": "awaiting_command"
         })
         session.insert(ignore_permissions=True)
-        return session
+        return ConversationSession(**{key: session.get(key) for key in SESSION_FIELDS})
+
+
+def update_session(session, values):
+    """Write conversation fields with a single UPDATE (no controller hooks) and mirror them on `session`"""
+    session.update(values)
+    session._changed.clear()
+    frappe.db.set_value("WhatsApp Session", session.name, values)
 
 
 def start_order_flow(from_phone, session):
     """Start the order process by showing menu"""
     # Reset session
-    session.current_step = "awaiting_item"
-    session.status = "active"
-    session.item_selected = ""
-    session.quantity = 0
-    session.delivery_address = ""
-    session.save(ignore_permissions=True)
+    update_session(session, {
+        "current_step": "awaiting_item",
+        "status": "active",
+        "item_selected": "",
+        "quantity": 0,
+        "delivery_address": ""
+    })
     
     # Get available items from ERPNext
     items = get_available_items()
     
-    menu_text = "🍕 Welcome! Here's our menu:\n\n"
-    for i, item in enumerate(items[:10], 1):  # Limit to 10 items
-        menu_text += f"{i}. {item.get('item_name')} - ${item.get('standard_rate', 0)}\n"
+    # Remember the menu so the reply can be matched without querying items again
+    frappe.cache().set_value(get_menu_cache_key(from_phone), build_menu(items), expires_in_sec=MENU_CACHE_TTL)
     
-    menu_text += "\nReply with the number (1-10) or item name to select."
+    menu_text = (
+        "🍕 Welcome! Here's our menu:\n\n"
+        + format_menu_lines(items[:10])  # Limit to 10 items
+        + "\nReply with the number (1-10) or item name to select."
+    )
     
     send_whatsapp_message(from_phone, menu_text)
 
 
+def format_menu_lines(items):
+    """Numbered menu lines, one per item, each ending in a newline"""
+    return "".join([f"{i}. {item.get('item_name')} - ${item.get('standard_rate', 0)}\n" for i, item in enumerate(items, 1)])
+
+
+def get_menu_cache_key(from_phone):
+    """Cache key for the menu last shown to a phone number"""
+    return f"whatsapp_integration:menu:{from_phone}"
+
+
+def get_session_menu(from_phone):
+    """Get the menu shown to this phone, rebuilding it if the cached copy expired"""
+    menu = frappe.cache().get_value(get_menu_cache_key(from_phone))
+    if not menu:
+        menu = build_menu(get_available_items())
+    return menu
+
+
+def build_menu(items):
+    """Pair the menu items with a lookup keyed by lowercase item name and a pattern matching any of the names"""
+    items_by_name = {}
+    for item in items:
+        name = (item.get("item_name") or "").lower()
+        if name:
+            items_by_name.setdefault(name, item)
+    
+    # One alternation scans the reply for every name in a single pass; longer names first so
+    # "chicken burger" wins over "burger"
+    names = sorted(items_by_name, key=len, reverse=True)
+    name_pattern = re.compile("|".join(map(re.escape, names))) if names else None
+    
+    return {"items": items, "items_by_name": items_by_name, "name_pattern": name_pattern}
+
+
 def get_available_items():
     """Get items from ERPNext Item doctype"""
+    items = frappe.cache().get_value(AVAILABLE_ITEMS_CACHE_KEY)
+    if items is not None:
+        return items
+    
     try:
-        items = frappe.db.sql("""
-            SELECT name as item_code, item_name, standard_rate, description
-            FROM `tabItem` 
-            WHERE disabled = 0 AND is_sales_item = 1 
-            ORDER BY item_name 
-            LIMIT 10
-        """, as_dict=True)
+        items = frappe.get_all("Item",
+            filters={"disabled": 0, "is_sales_item": 1},
+            fields=["name as item_code", "item_name", "standard_rate", "description"],
+            order_by="item_name asc",
+            limit=10
+        )
+        frappe.cache().set_value(AVAILABLE_ITEMS_CACHE_KEY, items, expires_in_sec=AVAILABLE_ITEMS_CACHE_TTL)
         return items
     except Exception as e:
-        frappe.logger().error(f"Error fetching items: {str(e)}")
+        logger.error(f"Error fetching items: {str(e)}")
         return []
 
 
+def clear_available_items_cache(doc=None, method=None):
+    """Drop the cached item list (Item doc event)"""
+    frappe.cache().delete_value(AVAILABLE_ITEMS_CACHE_KEY)
+
+
 def handle_item_selection(from_phone, session, user_text):
     """Handle item selection from user"""
-    items = get_available_items()
+    menu = get_session_menu(from_phone)
+    items = menu["items"]
     
     # Check if user entered a number
     try:
         item_index = int(user_text) - 1
         if 0 <= item_index < len(items):
-            selected_item = items[item_index]
-            session.item_selected = selected_item.get("item_code")
-            session.item_name = selected_item.get("item_name")
-            session.item_rate = selected_item.get("standard_rate", 0)
-            session.current_step = "awaiting_quantity"
-            session.save(ignore_permissions=True)
-            
-            send_whatsapp_message(from_phone, f"Great! You selected: {session.item_name}\n\nHow many would you like? (Enter a number)")
+            select_item(from_phone, session, items[item_index])
             return
     except ValueError:
         pass
     
-    # Check if user typed item name
-    for item in items:
-        if item.get("item_name", "").lower() in user_text.lower():
-            session.item_selected = item.get("item_code")
-            session.item_name = item.get("item_name")
-            session.item_rate = item.get("standard_rate", 0)
-            session.current_step = "awaiting_quantity"
-            session.save(ignore_permissions=True)
-            
-            send_whatsapp_message(from_phone, f"Great! You selected: {session.item_name}\n\nHow many would you like? (Enter a number)")
-            return
+    # Check if user typed item name, trying an exact match before a substring scan
+    user_text_lower = user_text.lower()
+    item = menu["items_by_name"].get(user_text_lower)
+    if not item and menu["name_pattern"]:
+        match = menu["name_pattern"].search(user_text_lower)
+        item = match and menu["items_by_name"][match.group()]
+    if item:
+        select_item(from_phone, session, item)
+        return
     
     # Invalid selection
     send_whatsapp_message(from_phone, "Sorry, I didn't understand. Please reply with a number (1-10) or type the item name.")
 
 
+def select_item(from_phone, session, item):
+    """Store the chosen item on the session and ask for quantity"""
+    update_session(session, {
+        "item_selected": item.get("item_code"),
+        "item_name": item.get("item_name"),
+        "item_rate": item.get("standard_rate", 0),
+        "current_step": "awaiting_quantity"
+    })
+    
+    send_whatsapp_message(from_phone, f"Great! You selected: {session.item_name}\n\nHow many would you like? (Enter a number)")
+
+
 def handle_quantity_selection(from_phone, session, user_text):
     """Handle quantity input"""
     try:
         quantity = int(user_text)
         if 1 <= quantity <= 20:
-            session.quantity = quantity
-            session.current_step = "awaiting_address"
-            session.save(ignore_permissions=True)
+            update_session(session, {"quantity": quantity, "current_step": "awaiting_address"})
             
             total = session.item_rate * quantity
             send_whatsapp_message(from_phone, f"Perfect! {quantity}x {session.item_name}\nTotal: ${total}\n\nPlease enter your delivery address:")
@@ -209,9 +412,7 @@ def handle_address_input(from_phone, session, user_text):
         send_whatsapp_message(from_phone, "Please enter a complete delivery address (at least 5 characters).")
         return
     
-    session.delivery_address = user_text.strip()
-    session.current_step = "awaiting_confirmation"
-    session.save(ignore_permissions=True)
+    update_session(session, {"delivery_address": user_text.strip(), "current_step": "awaiting_confirmation"})
     
     total = session.item_rate * session.quantity
     order_summary = f"""📋 Order Summary:
@@ -228,26 +429,46 @@ Confirm this order? Reply 'yes' to place order or 'no' to cancel."""
 
 def handle_confirmation(from_phone, session, user_text):
     """Handle order confirmation"""
-    if user_text.lower() in ["yes", "y", "confirm"]:
-        # Create the order
+    reply = user_text.lower()
+    if reply in CONFIRM_REPLIES:
+        # Customer, address, order and session are written as one unit and flushed in a single commit
+        frappe.db.savepoint("whatsapp_confirm_order")
         try:
             order_doc = create_whatsapp_order(session)
-            session.status = "completed"
-            session.order_created = order_doc.name
-            session.save(ignore_permissions=True)
             
-            send_whatsapp_message(from_phone, f"✅ Order placed successfully!\n\nOrder Number: {order_doc.name}\nEstimated delivery: 30 minutes\n\nThank you for your order! 🎉")
+            # Completing the session goes through the full Document so its validation runs
+            session_doc = frappe.get_doc("WhatsApp Session", session.name)
+            session_doc.status = "completed"
+            session_doc.order_created = order_doc.name
+            session_doc.save(ignore_permissions=True)
+            
+            frappe.db.commit()
             
         except Exception as e:
-            frappe.logger().error(f"Error creating order: {str(e)}")
+            frappe.db.rollback(save_point="whatsapp_confirm_order")
+            # A customer created inside the rolled back block must not stay cached
+            frappe.cache().hdel(CUSTOMER_CACHE_KEY, session.phone_number)
+            logger.error(f"Error creating order: {str(e)}")
             send_whatsapp_message(from_phone, "Sorry, there was an error placing your order. Please try again later.")
+            return
+        
+        send_whatsapp_message(from_phone, f"✅ Order placed successfully!\n\nOrder Number: {order_doc.name}\nEstimated delivery: 30 minutes\n\nThank you for your order! 🎉")
             
-    elif user_text.lower() in ["no", "n", "cancel"]:
-        cancel_order(from_phone, session)
+    elif reply in DECLINE_REPLIES:
+        cancel_session_order(from_phone, session)
     else:
         send_whatsapp_message(from_phone, "Please reply 'yes' to confirm or 'no' to cancel.")
 
 
+# Conversation step -> handler for the customer's reply
+STEP_HANDLERS = {
+    "awaiting_item": handle_item_selection,
+    "awaiting_quantity": handle_quantity_selection,
+    "awaiting_address": handle_address_input,
+    "awaiting_confirmation": handle_confirmation
+}
+
+
 def create_whatsapp_order(session):
     """Create WhatsApp Order in ERPNext"""
     # Create customer if doesn't exist
@@ -262,9 +483,7 @@ def create_whatsapp_order(session):
         "item": session.item_name,
         "quantity": session.quantity,
         "delivery_address": session.delivery_address,
-        "order_status": "Pending",
-        "created_at": datetime.now(),
-        "updated_at": datetime.now()
+        "order_status": "Pending"
     })
     
     order_doc.insert(ignore_permissions=True)
@@ -273,51 +492,83 @@ def create_whatsapp_order(session):
 
 def get_or_create_customer(phone_number, address):
     """Get or create customer from phone number"""
-    existing_customer = frappe.db.get_value("Customer", {"mobile_no": phone_number}, "name")
+    customer_name = frappe.cache().hget(CUSTOMER_CACHE_KEY, phone_number)
+    if customer_name:
+        return customer_name
+    
+    existing_customer = frappe.db.exists("Customer", {"mobile_no": phone_number})
     if existing_customer:
+        frappe.cache().hset(CUSTOMER_CACHE_KEY, phone_number, existing_customer)
         return existing_customer
     
-    # Create new customer
-    customer_doc = frappe.get_doc({
-        "doctype": "Customer",
-        "customer_name": f"WhatsApp Customer {phone_number}",
-        "mobile_no": phone_number,
-        "customer_group": "Individual",
-        "territory": "All Territories",
-        "customer_type": "Individual"
-    })
-    customer_doc.insert(ignore_permissions=True)
-    
-    # Create address
-    if address:
-        address_doc = frappe.get_doc({
-            "doctype": "Address",
-            "address_title": f"{customer_doc.name} Address",
-            "address_line1": address,
-            "city": "Unknown",
-            "country": "Kenya",
-            "links": [{"link_doctype": "Customer", "link_name": customer_doc.name}]
+    # Create customer and address together, so a failed address doesn't leave a stray customer
+    frappe.db.savepoint("whatsapp_customer")
+    try:
+        customer_doc = frappe.get_doc({
+            "doctype": "Customer",
+            "customer_name": f"WhatsApp Customer {phone_number}",
+            "mobile_no": phone_number,
+            "customer_group": "Individual",
+            "territory": "All Territories",
+            "customer_type": "Individual"
         })
-        address_doc.insert(ignore_permissions=True)
+        customer_doc.insert(ignore_permissions=True)
+        
+        # Create address
+        if address:
+            address_doc = frappe.get_doc({
+                "doctype": "Address",
+                "address_title": f"{customer_doc.name} Address",
+                "address_line1": address,
+                "city": "Unknown",
+                "country": "Kenya",
+                "links": [{"link_doctype": "Customer", "link_name": customer_doc.name}]
+            })
+            address_doc.insert(ignore_permissions=True)
+    except Exception:
+        frappe.db.rollback(save_point="whatsapp_customer")
+        raise
     
+    frappe.cache().hset(CUSTOMER_CACHE_KEY, phone_number, customer_doc.name)
     return customer_doc.name
 
 
-def cancel_order(from_phone, session):
-    """Cancel the current order"""
-    session.status = "cancelled"
-    session.save(ignore_permissions=True)
+def clear_customer_cache(doc, method=None):
+    """Forget the cached customer for a phone number (Customer doc event)"""
+    if doc.mobile_no:
+        frappe.cache().hdel(CUSTOMER_CACHE_KEY, doc.mobile_no)
+
+
+def cancel_session_order(from_phone, session):
+    """Cancel the order in progress for a conversation"""
+    # Reset the step too, so a late reply can't resume the cancelled order
+    update_session(session, {"status": "cancelled", "current_step": "awaiting_command"})
     send_whatsapp_message(from_phone, "Order cancelled. Type 'order' to start a new order anytime! 👋")
 
 
 def send_whatsapp_message(to_phone, message_text):
-    """Send WhatsApp message using Meta API"""
+    """Queue a WhatsApp message so the webhook response doesn't wait on the Graph API"""
+    frappe.enqueue(
+        "whatsapp_integration.whatsapp_integration.api.deliver_whatsapp_message",
+        queue="short",
+        enqueue_after_commit=True,
+        to_phone=to_phone,
+        message_text=message_text
+    )
+
+
+def get_whatsapp_credentials():
+    """(token, phone_id) from the site config"""
+    return frappe.conf.get("whatsapp_token"), frappe.conf.get("whatsapp_phone_id")
+
+
+def deliver_whatsapp_message(to_phone, message_text):
+    """Send WhatsApp message using Meta API (runs in a background job)"""
     try:
-        token = frappe.conf.get("whatsapp_token")
-        phone_id = frappe.conf.get("whatsapp_phone_id")
+        token, phone_id = get_whatsapp_credentials()
         
         if not token or not phone_id:
-            frappe.logger().error("WhatsApp credentials not configured")
+            logger.error("WhatsApp credentials not configured")
             return
         
         url = f"https://graph.facebook.com/v17.0/{phone_id}/messages"
@@ -332,14 +583,14 @@ def send_whatsapp_message(to_phone, message_text):
             "text": {"body": message_text}
         }
         
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
+        response = _WA_CLIENT.post(url, headers=headers, json=payload, timeout=10)
         response.raise_for_status()
         
-        frappe.logger().info(f"WhatsApp message sent successfully to {to_phone}")
+        logger.info(f"WhatsApp message sent successfully to {to_phone}")
         return response.json()
         
     except Exception as e:
-        frappe.logger().error(f"Failed to send WhatsApp message: {str(e)}")
+        logger.error(f"Failed to send WhatsApp message: {str(e)}")
         raise
 
 
@@ -364,21 +615,16 @@ def test_order():
         delivery_address = data.get("delivery_address", "123 Test Street")
         
         # Create the order
-        order_doc = frappe.get_doc({
-            "doctype": "WhatsApp Order",
+        order_doc = insert_order_row({
             "naming_series": "WOR-.YYYY.-.#####",
             "customer_name": customer_name,
             "phone_number": phone_number,
             "item": item,
             "quantity": quantity,
             "delivery_address": delivery_address,
-            "order_status": "Pending",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
+            "order_status": "Pending"
         })
         
-        order_doc.insert(ignore_permissions=True)
-        
         return {
             "status": "success",
             "message": f"Order {order_doc.name} created successfully!",
@@ -395,7 +641,7 @@ def test_order():
         }
         
     except Exception as e:
-        frappe.logger().error(f"Error creating test order: {str(e)}")
+        logger.error(f"Error creating test order: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to create order: {str(e)}"
@@ -437,21 +683,16 @@ def simulate_whatsapp_conversation():
         ]
         
         # Create the order as if user confirmed
-        order_doc = frappe.get_doc({
-            "doctype": "WhatsApp Order",
+        order_doc = insert_order_row({
             "naming_series": "WOR-.YYYY.-.#####",
             "customer_name": "Simulated Customer",
             "phone_number": "254700000000",
             "item": "Pizza",
             "quantity": 2,
             "delivery_address": "123 Main Street, Nairobi",
-            "order_status": "Pending",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
+            "order_status": "Pending"
         })
         
-        order_doc.insert(ignore_permissions=True)
-        
         conversation_steps.append(f"Bot: ✅ Order placed successfully!")
         conversation_steps.append(f"Bot: Order Number: {order_doc.name}")
         conversation_steps.append("Bot: Estimated delivery: 30 minutes")
@@ -465,7 +706,7 @@ def simulate_whatsapp_conversation():
         }
         
     except Exception as e:
-        frappe.logger().error(f"Error simulating conversation: {str(e)}")
+        logger.error(f"Error simulating conversation: {str(e)}")
         return {
             "status": "error", 
             "message": f"Failed to simulate conversation: {str(e)}"
@@ -478,17 +719,9 @@ def get_menu():
     Usage: GET /api/method/whatsapp_integration.api.get_menu
     """
     try:
-        items = frappe.db.sql("""
-            SELECT name as item_code, item_name, standard_rate, description
-            FROM `tabItem` 
-            WHERE disabled = 0 AND is_sales_item = 1 
-            ORDER BY item_name 
-            LIMIT 10
-        """, as_dict=True)
-        
-        menu_text = "🍕 Available Items:\n\n"
-        for i, item in enumerate(items, 1):
-            menu_text += f"{i}. {item.get('item_name')} - ${item.get('standard_rate', 0)}\n"
+        items = get_available_items()
+        
+        menu_text = "🍕 Available Items:\n\n" + format_menu_lines(items)
         
         return {
             "status": "success",
@@ -497,7 +730,7 @@ def get_menu():
         }
         
     except Exception as e:
-        frappe.logger().error(f"Error fetching menu: {str(e)}")
+        logger.error(f"Error fetching menu: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to fetch menu: {str(e)}"
@@ -527,13 +760,15 @@ def get_customer_orders(phone_number=None, customer_name=None):
                 "message": "Please provide phone_number or customer_name"
             }
         
-        # Get orders
-        orders = frappe.get_all("WhatsApp Order",
-            filters=filters,
-            fields=["name", "customer_name", "phone_number", "item", "quantity", 
-                   "delivery_address", "order_status", "created_at", "updated_at"],
-            order_by="creation desc"
-        )
+        # Get orders; a phone-only lookup is served from the per-phone cache
+        if customer_name:
+            orders = frappe.get_all("WhatsApp Order",
+                filters=filters,
+                fields=PHONE_ORDER_FIELDS,
+                order_by="creation desc"
+            )
+        else:
+            orders = get_orders_for_phone(phone_number)
         
         if not orders:
             return {
@@ -555,7 +790,7 @@ def get_customer_orders(phone_number=None, customer_name=None):
         }
         
     except Exception as e:
-        frappe.logger().error(f"Error fetching customer orders: {str(e)}")
+        logger.error(f"Error fetching customer orders: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to fetch orders: {str(e)}"
@@ -593,8 +828,8 @@ def get_order_status(order_id):
                 "quantity": order.quantity,
                 "delivery_address": order.delivery_address,
                 "order_status": order.order_status,
-                "created_at": order.created_at,
-                "updated_at": order.updated_at,
+                "created_at": order.creation,
+                "updated_at": order.modified,
                 "status_message": get_status_message(order.order_status)
             }
         }
@@ -605,7 +840,7 @@ def get_order_status(order_id):
             "message": f"Order {order_id} not found"
         }
     except Exception as e:
-        frappe.logger().error(f"Error fetching order status: {str(e)}")
+        logger.error(f"Error fetching order status: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to fetch order status: {str(e)}"
@@ -634,15 +869,12 @@ def update_order_status(order_id, new_status, notes=None):
             }
         
         # Get and update order
-        order = frappe.get_doc("WhatsApp Order", order_id)
+        order = get_order_for_status_change(order_id)
         old_status = order.order_status
-        order.order_status = new_status
-        order.updated_at = datetime.now()
+        set_order_status(order, new_status)
         
         if notes:
-            order.add_comment("Comment", f"Status changed from {old_status} to {new_status}. Notes: {notes}")
-        
-        order.save(ignore_permissions=True)
+            add_order_comment(order_id, f"Status changed from {old_status} to {new_status}. Notes: {notes}")
         
         # Send WhatsApp notification if configured
         try:
@@ -657,7 +889,7 @@ def update_order_status(order_id, new_status, notes=None):
                 "order_id": order.name,
                 "old_status": old_status,
                 "new_status": new_status,
-                "updated_at": order.updated_at,
+                "updated_at": order.modified,
                 "status_message": get_status_message(new_status)
             }
         }
@@ -668,7 +900,7 @@ def update_order_status(order_id, new_status, notes=None):
             "message": f"Order {order_id} not found"
         }
     except Exception as e:
-        frappe.logger().error(f"Error updating order status: {str(e)}")
+        logger.error(f"Error updating order status: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to update order status: {str(e)}"
@@ -689,7 +921,7 @@ def cancel_order(order_id, reason=None):
             }
         
         # Get order
-        order = frappe.get_doc("WhatsApp Order", order_id)
+        order = get_order_for_status_change(order_id)
         
         # Check if order can be cancelled
         if order.order_status in ["Delivered", "Cancelled"]:
@@ -700,13 +932,10 @@ def cancel_order(order_id, reason=None):
         
         # Cancel order
         old_status = order.order_status
-        order.order_status = "Cancelled"
-        order.updated_at = datetime.now()
+        set_order_status(order, "Cancelled")
         
         cancel_reason = reason or "Customer requested cancellation"
-        order.add_comment("Comment", f"Order cancelled. Reason: {cancel_reason}")
-        
-        order.save(ignore_permissions=True)
+        add_order_comment(order_id, f"Order cancelled. Reason: {cancel_reason}")
         
         return {
             "status": "success",
@@ -716,7 +945,7 @@ def cancel_order(order_id, reason=None):
                 "old_status": old_status,
                 "new_status": "Cancelled",
                 "cancellation_reason": cancel_reason,
-                "cancelled_at": order.updated_at
+                "cancelled_at": order.modified
             }
         }
         
@@ -726,7 +955,7 @@ def cancel_order(order_id, reason=None):
             "message": f"Order {order_id} not found"
         }
     except Exception as e:
-        frappe.logger().error(f"Error cancelling order: {str(e)}")
+        logger.error(f"Error cancelling order: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to cancel order: {str(e)}"
@@ -746,12 +975,8 @@ def get_order_history(phone_number, limit=10):
             }
         
         # Get orders with pagination
-        orders = frappe.get_all("WhatsApp Order",
-            filters={"phone_number": phone_number},
-            fields=["name", "item", "quantity", "order_status", "created_at", "updated_at"],
-            order_by="creation desc",
-            limit=limit
-        )
+        limit = min(max(frappe.utils.cint(limit), 1), MAX_ORDER_HISTORY)
+        orders = get_orders_for_phone(phone_number, limit)
         
         # Format order history
         order_history = []
@@ -775,7 +1000,7 @@ def get_order_history(phone_number, limit=10):
         }
         
     except Exception as e:
-        frappe.logger().error(f"Error fetching order history: {str(e)}")
+        logger.error(f"Error fetching order history: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to fetch order history: {str(e)}"
@@ -788,34 +1013,37 @@ def search_orders(query=None, status=None, date_from=None, date_to=None):
     Usage: GET /api/method/whatsapp_integration.api.search_orders?query=pizza&status=Pending
     """
     try:
-        # Build filters
-        filters = {}
+        # Build one WHERE clause; the text query matches order ID, customer name or item
+        conditions = []
+        values = {}
         
         if query:
-            # Search in customer name, item, or order ID
-            filters["name"] = ["like", f"%{query}%"]
+            conditions.append("(name LIKE %(query)s OR customer_name LIKE %(query)s OR item LIKE %(query)s)")
+            values["query"] = f"%{query}%"
         
         if status:
-            filters["order_status"] = status
+            conditions.append("order_status = %(status)s")
+            values["status"] = status
         
+        # Half-open range, so orders placed during date_to itself are included
         if date_from:
-            filters["created_at"] = [">=", date_from]
+            conditions.append("creation >= %(date_from)s")
+            values["date_from"] = get_day_bounds(date_from)[0]
         
         if date_to:
-            if "created_at" in filters:
-                filters["created_at"].append("<=")
-                filters["created_at"].append(date_to)
-            else:
-                filters["created_at"] = ["<=", date_to]
+            conditions.append("creation < %(date_to)s")
+            values["date_to"] = get_day_bounds(date_to)[1]
+        
+        where_clause = f"WHERE {' AND '.join(conditions)}" if conditions else ""
         
         # Get orders
-        orders = frappe.get_all("WhatsApp Order",
-            filters=filters,
-            fields=["name", "customer_name", "phone_number", "item", "quantity", 
-                   "order_status", "created_at"],
-            order_by="creation desc",
-            limit=50
-        )
+        orders = frappe.db.sql(f"""
+            SELECT name, customer_name, phone_number, item, quantity, order_status, creation AS created_at
+            FROM `tabWhatsApp Order`
+            {where_clause}
+            ORDER BY creation DESC
+            LIMIT 50
+        """, values, as_dict=True)
         
         return {
             "status": "success",
@@ -831,7 +1059,7 @@ def search_orders(query=None, status=None, date_from=None, date_to=None):
         }
         
     except Exception as e:
-        frappe.logger().error(f"Error searching orders: {str(e)}")
+        logger.error(f"Error searching orders: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to search orders: {str(e)}"
@@ -842,46 +1070,144 @@ def search_orders(query=None, status=None, date_from=None, date_to=None):
 
 def get_status_message(status):
     """Get user-friendly status message"""
-    status_messages = {
-        "Pending": "Your order is being processed",
-        "Confirmed": "Order confirmed! We're preparing your order",
-        "Preparing": "Your order is being prepared",
-        "Out for Delivery": "Your order is on its way!",
-        "Delivered": "Order delivered successfully!",
-        "Cancelled": "Order has been cancelled"
-    }
-    return status_messages.get(status, "Unknown status")
+    return STATUS_MESSAGES.get(status, "Unknown status")
+
+def get_day_bounds(date):
+    """Start of the given day and start of the next one"""
+    start = datetime.datetime.combine(getdate(date), datetime.time.min)
+    return start, start + datetime.timedelta(days=1)
+
+
+def get_date_range_filters(date_from=None, date_to=None):
+    """creation filters covering date_from through date_to inclusive, as [start, end) bounds"""
+    filters = []
+    if date_from:
+        filters.append(["creation", ">=", get_day_bounds(date_from)[0]])
+    if date_to:
+        filters.append(["creation", "<", get_day_bounds(date_to)[1]])
+    return filters
+
+
+def dumps_json(value):
+    """JSON bytes for a response value, with dates and other Frappe types encoded as Frappe does"""
+    if orjson:
+        return orjson.dumps(value, default=json_handler, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    return json.dumps(value, default=json_handler, separators=(",", ":")).encode()
+
+
+def stream_json_response(result, rows_key):
+    """Streamed response with the same body as returning `result`, encoding result[rows_key] row by row"""
+    rows = result.pop(rows_key)
+    
+    def generate():
+        yield b'{"message":'
+        yield dumps_json(result)[:-1]  # leave the object open for the rows
+        yield b"," + dumps_json(rows_key) + b":["
+        for i, row in enumerate(rows):
+            if i:
+                yield b","
+            yield dumps_json(row)
+        yield b"]}}"
+    
+    return Response(generate(), mimetype="application/json")
+
+
+def get_orders_for_phone(phone_number, limit=None):
+    """A phone number's orders, newest first (the latest `limit` if given), cached briefly for polling clients"""
+    cache_key = get_phone_orders_cache_key(phone_number, limit)
+    orders = frappe.cache().get_value(cache_key)
+    
+    if orders is None:
+        orders = frappe.get_all("WhatsApp Order",
+            filters={"phone_number": phone_number},
+            fields=PHONE_ORDER_FIELDS,
+            order_by="creation desc",
+            limit=limit
+        )
+        frappe.cache().set_value(cache_key, orders, expires_in_sec=PHONE_ORDERS_CACHE_TTL)
+    
+    return orders
+
+def get_phone_orders_cache_key(phone_number, limit=None):
+    """Cache key for a phone number's order list, one per limit"""
+    return f"{get_phone_orders_cache_prefix(phone_number)}{limit or 'all'}"
+
+def get_phone_orders_cache_prefix(phone_number):
+    """Prefix shared by every cached order list of a phone number"""
+    return f"whatsapp_integration:orders:{phone_number}:"
+
+def get_order_for_status_change(order_id):
+    """Read just the order fields a status change needs, without loading the Document"""
+    order = frappe.db.get_value("WhatsApp Order", order_id,
+        ["name", "order_status", "phone_number", "creation"], as_dict=True)
+    if not order:
+        raise frappe.DoesNotExistError(f"WhatsApp Order {order_id} not found")
+    return order
+
+def set_order_status(order, new_status):
+    """Write a new status with a single UPDATE and mirror it on `order`"""
+    order.order_status = new_status
+    order.modified = now_datetime()
+    frappe.db.set_value("WhatsApp Order", order.name, "order_status", order.order_status, modified=order.modified)
+    
+    # set_value skips doc events, so drop the cached lookups here
+    clear_order_caches(order)
+
+def add_order_comment(order_id, text):
+    """Add a timeline comment to an order"""
+    frappe.get_doc({
+        "doctype": "Comment",
+        "comment_type": "Comment",
+        "reference_doctype": "WhatsApp Order",
+        "reference_name": order_id,
+        "content": text
+    }).insert(ignore_permissions=True)
+
+def get_daily_totals_cache_key(date):
+    """Cache key for a day's grouped order totals"""
+    return f"whatsapp_integration:daily_order_totals:{frappe.utils.getdate(date)}"
+
+def clear_order_caches(doc, method=None):
+    """Drop every cached lookup that includes this order (WhatsApp Order doc event)"""
+    clear_daily_order_totals_cache(doc)
+    if doc.phone_number:
+        frappe.cache().delete_keys(get_phone_orders_cache_prefix(doc.phone_number))
+
+def clear_daily_order_totals_cache(doc, method=None):
+    """Drop cached daily totals for the day an order was created (WhatsApp Order doc event)"""
+    if doc.creation:
+        frappe.cache().delete_value(get_daily_totals_cache_key(doc.creation))
 
 def send_status_update_notification(order):
     """Send WhatsApp notification when order status changes"""
     try:
-        token = frappe.conf.get("whatsapp_token")
-        phone_id = frappe.conf.get("whatsapp_phone_id")
+        token, phone_id = get_whatsapp_credentials()
         
         if not token or not phone_id:
             return  # Skip if WhatsApp not configured
         
-        status_message = get_status_message(order.order_status)
-        notification_text = f"""📱 Order Update
-
-Order: {order.name}
-Status: {order.order_status}
-Message: {status_message}
-
-Thank you for choosing us! 🎉"""
+        notification_text = STATUS_UPDATE_TEMPLATE.format(
+            order_id=order.name,
+            status=order.order_status,
+            status_message=get_status_message(order.order_status)
+        )
         
         send_whatsapp_message(order.phone_number, notification_text)
         
     except Exception as e:
-        frappe.logger().error(f"Failed to send status update notification: {str(e)}")
+        logger.error(f"Failed to send status update notification: {str(e)}")
 
 @frappe.whitelist(allow_guest=True)
-def get_orders_by_date(date=None, date_from=None, date_to=None):
+def get_orders_by_date(date=None, date_from=None, date_to=None, limit_start=0, page_length=ORDERS_PAGE_LENGTH, stream=0):
     """
-    Get orders by specific date or date range
+    Get orders by specific date or date range, one page at a time (newest first)
     Usage: 
     - GET /api/method/whatsapp_integration.api.get_orders_by_date?date=2025-09-24
     - GET /api/method/whatsapp_integration.api.get_orders_by_date?date_from=2025-09-20&date_to=2025-09-24
+    - GET /api/method/whatsapp_integration.api.get_orders_by_date?date=2025-09-24&limit_start=100&page_length=100
+    page_length defaults to ORDERS_PAGE_LENGTH and is capped at MAX_ORDERS_PAGE_LENGTH;
+    total_found is the count of all matching orders, not just this page.
+    Pass stream=1 to have the orders encoded and sent one at a time; the body is the same.
     """
     try:
         if not date and not date_from and not date_to:
@@ -890,44 +1216,48 @@ def get_orders_by_date(date=None, date_from=None, date_to=None):
                 "message": "Please provide either 'date' or 'date_from' and/or 'date_to' parameters"
             }
         
-        filters = {}
-        
+        # Half-open [start, end) ranges on creation, so the index is used as-is
         if date:
             # Single date - get orders for that specific date
-            filters["creation"] = ["between", [f"{date} 00:00:00", f"{date} 23:59:59"]]
+            filters = get_date_range_filters(date, date)
         else:
             # Date range
-            if date_from:
-                filters["creation"] = [">=", f"{date_from} 00:00:00"]
-            if date_to:
-                if "creation" in filters:
-                    filters["creation"].append("<=")
-                    filters["creation"].append(f"{date_to} 23:59:59")
-                else:
-                    filters["creation"] = ["<=", f"{date_to} 23:59:59"]
+            filters = get_date_range_filters(date_from, date_to)
+        
+        limit_start = max(frappe.utils.cint(limit_start), 0)
+        page_length = min(max(frappe.utils.cint(page_length), 1), MAX_ORDERS_PAGE_LENGTH)
         
         # Get orders with all details
         orders = frappe.get_all("WhatsApp Order",
             filters=filters,
             fields=["name", "customer_name", "phone_number", "item", "quantity", 
                    "order_status", "delivery_address", "creation", "modified"],
-            order_by="creation desc"
+            order_by="creation desc",
+            limit_start=limit_start,
+            limit_page_length=page_length
         )
+        total = frappe.db.count("WhatsApp Order", filters=filters)
         
-        return {
+        result = {
             "status": "success",
-            "message": f"Found {len(orders)} orders for the specified date(s)",
+            "message": f"Found {total} orders for the specified date(s)",
             "search_criteria": {
                 "date": date,
                 "date_from": date_from,
                 "date_to": date_to
             },
             "orders": orders,
-            "total_found": len(orders)
+            "total_found": total,
+            "limit_start": limit_start,
+            "page_length": page_length
         }
         
+        if frappe.utils.cint(stream):
+            return stream_json_response(result, "orders")
+        return result
+        
     except Exception as e:
-        frappe.logger().error(f"Error getting orders by date: {str(e)}")
+        logger.error(f"Error getting orders by date: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to get orders by date: {str(e)}"
@@ -977,81 +1307,129 @@ def get_order_products(order_id):
             "message": f"Order {order_id} not found"
         }
     except Exception as e:
-        frappe.logger().error(f"Error getting order products: {str(e)}")
+        logger.error(f"Error getting order products: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to get order products: {str(e)}"
         }
 
 @frappe.whitelist(allow_guest=True)
-def get_daily_order_summary(date=None):
+def get_daily_order_summary(date=None, include_orders=0, stream=0):
     """
     Get daily order summary with products and quantities
     Usage: GET /api/method/whatsapp_integration.api.get_daily_order_summary?date=2025-09-24
+    Pass include_orders=1 to also get the day's orders (up to DAILY_SUMMARY_ORDER_LIMIT),
+    and stream=1 with it to have those orders encoded and sent one at a time
     """
     try:
         if not date:
             date = frappe.utils.today()
         
-        # Get all orders for the date
-        filters = {
-            "creation": ["between", [f"{date} 00:00:00", f"{date} 23:59:59"]]
+        day_start, day_end = get_day_bounds(date)
+        
+        # Totals are grouped in the database; only aggregate rows come back
+        product_rows = frappe.db.sql("""
+            SELECT item, SUM(quantity) AS total_quantity, COUNT(*) AS order_count
+            FROM `tabWhatsApp Order`
+            WHERE creation >= %s AND creation < %s
+            GROUP BY item
+        """, (day_start, day_end), as_dict=True)
+        
+        status_summary = dict(frappe.db.sql("""
+            SELECT order_status, COUNT(*)
+            FROM `tabWhatsApp Order`
+            WHERE creation >= %s AND creation < %s
+            GROUP BY order_status
+        """, (day_start, day_end)))
+        
+        product_summary = {
+            row.item: {
+                "item_name": row.item,
+                "total_quantity": row.total_quantity or 0,
+                "order_count": row.order_count
+            }
+            for row in product_rows
         }
         
-        orders = frappe.get_all("WhatsApp Order",
-            filters=filters,
-            fields=["name", "item", "quantity", "order_status", "creation"]
-        )
-        
-        # Group by products and calculate totals
-        product_summary = {}
-        status_summary = {}
-        total_orders = len(orders)
-        total_quantity = 0
+        summary = {
+            "status": "success",
+            "date": date,
+            "summary": {
+                "total_orders": sum(row.order_count for row in product_rows),
+                "total_quantity": sum(row.total_quantity or 0 for row in product_rows),
+                "status_breakdown": status_summary
+            },
+            "products": list(product_summary.values())
+        }
         
-        for order in orders:
-            # Product summary
-            if order.item not in product_summary:
-                product_summary[order.item] = {
-                    "item_name": order.item,
-                    "total_quantity": 0,
-                    "order_count": 0,
-                    "orders": []
-                }
+        if frappe.utils.cint(include_orders):
+            orders = frappe.get_all("WhatsApp Order",
+                filters=get_date_range_filters(date, date),
+                fields=["name", "item", "quantity", "order_status", "creation"],
+                order_by="creation desc",
+                limit=DAILY_SUMMARY_ORDER_LIMIT
+            )
             
-            product_summary[order.item]["total_quantity"] += order.quantity
-            product_summary[order.item]["order_count"] += 1
-            product_summary[order.item]["orders"].append({
-                "order_id": order.name,
-                "quantity": order.quantity,
-                "status": order.order_status
-            })
+            orders_by_item = defaultdict(list)
+            for order in orders:
+                orders_by_item[order.item].append({
+                    "order_id": order.name,
+                    "quantity": order.quantity,
+                    "status": order.order_status
+                })
             
-            # Status summary
-            status = order.order_status
-            if status not in status_summary:
-                status_summary[status] = 0
-            status_summary[status] += 1
+            # Orders placed after the aggregates ran have no product entry and are left out here
+            for item, product in product_summary.items():
+                product["orders"] = orders_by_item[item]
             
-            total_quantity += order.quantity
+            summary["orders"] = orders
+            
+            if frappe.utils.cint(stream):
+                return stream_json_response(summary, "orders")
+        
+        return summary
+        
+    except Exception as e:
+        logger.error(f"Error getting daily order summary: {str(e)}")
+        return {
+            "status": "error",
+            "message": f"Failed to get daily order summary: {str(e)}"
+        }
+
+@frappe.whitelist(allow_guest=True)
+def get_daily_order_totals(date=None):
+    """
+    Get order counts and quantities for a day, grouped by item and status
+    Usage: GET /api/method/whatsapp_integration.api.get_daily_order_totals?date=2025-09-24
+    """
+    try:
+        if not date:
+            date = frappe.utils.today()
+        
+        cache_key = get_daily_totals_cache_key(date)
+        totals = frappe.cache().get_value(cache_key)
+        
+        if totals is None:
+            # Let the database do the grouping instead of shipping every order row
+            totals = frappe.db.sql("""
+                SELECT item, order_status, COUNT(*) AS order_count, SUM(quantity) AS total_quantity
+                FROM `tabWhatsApp Order`
+                WHERE creation >= %s AND creation < %s
+                GROUP BY item, order_status
+            """, get_day_bounds(date), as_dict=True)
+            frappe.cache().set_value(cache_key, totals, expires_in_sec=DAILY_TOTALS_CACHE_TTL)
         
         return {
             "status": "success",
             "date": date,
-            "summary": {
-                "total_orders": total_orders,
-                "total_quantity": total_quantity,
-                "status_breakdown": status_summary
-            },
-            "products": list(product_summary.values()),
-            "orders": orders
+            "totals": totals
         }
         
     except Exception as e:
-        frappe.logger().error(f"Error getting daily order summary: {str(e)}")
+        logger.error(f"Error getting daily order totals: {str(e)}")
         return {
             "status": "error",
-            "message": f"Failed to get daily order summary: {str(e)}"
+            "message": f"Failed to get daily order totals: {str(e)}"
         }
 
 # PRODUCT AND VARIANT MANAGEMENT APIs
@@ -1066,17 +1444,22 @@ def get_product_variants(product_name=None):
     - GET /api/method/whatsapp_integration.api.get_product_variants?product_name=Pizza
     """
     try:
-        filters = {"is_available": 1}  # Only available variants
-        
-        if product_name:
-            filters["product_name"] = ["like", f"%{product_name}%"]
+        cache_key = f"{PRODUCT_VARIANTS_CACHE_KEY}:{product_name or ''}"
+        variants = frappe.cache().get_value(cache_key)
         
-        variants = frappe.get_all("WhatsApp Product Variant",
-            filters=filters,
-            fields=["name", "variant_name", "product_name", "variant_type", 
-                    "unit_price", "currency", "stock_quantity", "is_available"],
-            order_by="product_name asc, variant_name asc"
-        )
+        if variants is None:
+            filters = {"is_available": 1}  # Only available variants
+            
+            if product_name:
+                filters["product_name"] = ["like", f"%{product_name}%"]
+            
+            variants = frappe.get_all("WhatsApp Product Variant",
+                filters=filters,
+                fields=["name", "variant_name", "product_name", "variant_type", 
+                        "unit_price", "currency", "stock_quantity", "is_available"],
+                order_by="product_name asc, variant_name asc"
+            )
+            frappe.cache().set_value(cache_key, variants, expires_in_sec=PRODUCT_VARIANTS_CACHE_TTL)
         
         return {
             "status": "success",
@@ -1087,7 +1470,7 @@ def get_product_variants(product_name=None):
         }
         
     except Exception as e:
-        frappe.logger().error(f"Error getting product variants: {str(e)}")
+        logger.error(f"Error getting product variants: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to get product variants: {str(e)}"
@@ -1100,41 +1483,83 @@ def get_products_menu():
     Usage: GET /api/method/whatsapp_integration.api.get_products_menu
     """
     try:
-        variants = frappe.get_all("WhatsApp Product Variant",
-            filters={"is_available": 1},
-            fields=["product_name", "variant_name", "unit_price", "currency"],
-            order_by="product_name asc, unit_price asc"
-        )
-        
-        menu = {}
-        for v in variants:
-            if v.product_name not in menu:
-                menu[v.product_name] = []
-            menu[v.product_name].append({
-                "variant_name": v.variant_name,
-                "unit_price": v.unit_price,
-                "currency": v.currency
-            })
-        
-        formatted_menu = []
-        for product, var_list in menu.items():
-            formatted_menu.append(f"*{product}*:")
-            for var in var_list:
-                formatted_menu.append(f"  - {var.variant_name}: {var.currency} {var.unit_price}")
+        products_menu = frappe.cache().get_value(PRODUCTS_MENU_CACHE_KEY)
+        if products_menu is None:
+            products_menu = build_products_menu()
+            frappe.cache().set_value(PRODUCTS_MENU_CACHE_KEY, products_menu, expires_in_sec=PRODUCT_VARIANTS_CACHE_TTL)
         
         return {
             "status": "success",
             "message": "Current menu with variants",
-            "menu_data": menu,
-            "formatted_menu": "\n".join(formatted_menu)
+            "menu_data": products_menu["menu_data"],
+            "formatted_menu": products_menu["formatted_menu"]
         }
     except Exception as e:
-        frappe.logger().error(f"Error getting products menu: {str(e)}")
+        logger.error(f"Error getting products menu: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to get products menu: {str(e)}"
         }
 
+def build_products_menu():
+    """Available variants grouped by product, plus the menu text shown to customers"""
+    # Plain tuples, already ordered by product so they can be grouped in one pass
+    rows = frappe.db.sql("""
+        SELECT product_name, variant_name, unit_price, currency
+        FROM `tabWhatsApp Product Variant`
+        WHERE is_available = 1
+        ORDER BY product_name ASC, unit_price ASC
+    """)
+    
+    menu = {}
+    formatted_menu = []
+    for product, group in itertools.groupby(rows, key=operator.itemgetter(0)):
+        group = list(group)
+        menu[product] = [
+            {"variant_name": variant_name, "unit_price": unit_price, "currency": currency}
+            for _, variant_name, unit_price, currency in group
+        ]
+        formatted_menu.append(f"*{product}*:")
+        formatted_menu.extend(f"  - {row[1]}: {row[3]} {row[2]}" for row in group)
+    
+    return {
+        "menu_data": menu,
+        "formatted_menu": "\n".join(formatted_menu)
+    }
+
+def clear_product_variant_caches(doc=None, method=None):
+    """Drop the cached variant lists and products menu (WhatsApp Product Variant doc event)"""
+    frappe.cache().delete_value(PRODUCTS_MENU_CACHE_KEY)
+    frappe.cache().delete_keys(PRODUCT_VARIANTS_CACHE_KEY)
+    # A new version makes every worker's get_cached_variant entries unreachable
+    frappe.cache().set(frappe.cache().make_key(VARIANT_VERSION_CACHE_KEY), frappe.generate_hash(length=10))
+
+def get_variant_version():
+    """Current version token for the per-worker variant cache"""
+    cache = frappe.cache()
+    key = cache.make_key(VARIANT_VERSION_CACHE_KEY)
+    version = cache.get(key)
+    if version is None:
+        # The key was evicted or cleared: start a fresh version rather than fall back to a fixed one
+        # that older entries may be keyed on. nx lets the first worker's token win a race.
+        cache.set(key, frappe.generate_hash(length=10), nx=True)
+        version = cache.get(key)
+    return version.decode()
+
+@functools.lru_cache(maxsize=1024)
+def get_cached_variant(site, variant_id, version):
+    """Pricing fields of a variant, memoized in this worker until the variant version changes.
+    Stock and availability change with every order, so they are left out."""
+    return frappe.db.get_value("WhatsApp Product Variant", variant_id,
+        ["name", "product_name", "variant_name", "unit_price", "currency"],
+        as_dict=True
+    )
+
+@functools.lru_cache(maxsize=None)
+def get_variant_columns(site):
+    """All table columns of WhatsApp Product Variant, read from the meta once per site in each worker"""
+    return list(frappe.get_meta("WhatsApp Product Variant").get_valid_columns())
+
 @frappe.whitelist(allow_guest=True)
 def get_variant_details(variant_id):
     """
@@ -1142,18 +1567,20 @@ def get_variant_details(variant_id):
     Usage: GET /api/method/whatsapp_integration.api.get_variant_details?variant_id=Pizza%20Margherita%20-%20Large
     """
     try:
-        variant = frappe.get_doc("WhatsApp Product Variant", variant_id)
+        variant = frappe.db.get_value("WhatsApp Product Variant", variant_id,
+            get_variant_columns(frappe.local.site), as_dict=True)
+        if not variant:
+            return {
+                "status": "error",
+                "message": f"Variant {variant_id} not found."
+            }
+        
         return {
             "status": "success",
-            "variant_details": variant.as_dict()
-        }
-    except frappe.DoesNotExistError:
-        return {
-            "status": "error",
-            "message": f"Variant {variant_id} not found."
+            "variant_details": variant
         }
     except Exception as e:
-        frappe.logger().error(f"Error getting variant details: {str(e)}")
+        logger.error(f"Error getting variant details: {str(e)}")
         return {
             "status": "error",
             "message": f"Failed to get variant details: {str(e)}"
@@ -1176,44 +1603,44 @@ def create_order_with_variant(customer_name, phone_number, variant_id, quantity,
         if not all([customer_name, phone_number, variant_id, quantity, delivery_address]):
             return {"status": "error", "message": "All fields (customer_name, phone_number, variant_id, quantity, delivery_address) are required."}
 
-        quantity = frappe.parse_json(quantity) if isinstance(quantity, str) else quantity
-        if not isinstance(quantity, (int, float)) or quantity <= 0:
-            return {"status": "error", "message": "Quantity must be a positive number."}
+        quantity = parse_quantity(quantity)
+        if not quantity:
+            return {"status": "error", "message": "Quantity must be a positive integer."}
 
-        # Fetch variant details
-        variant = frappe.get_doc("WhatsApp Product Variant", variant_id)
-        if not variant.is_available:
-            return {"status": "error", "message": f"Variant {variant_id} is currently not available."}
-        if variant.stock_quantity < quantity:
-            return {"status": "error", "message": f"Insufficient stock for {variant_id}. Available: {variant.stock_quantity}"}
+        # Fetch variant details (availability and stock are checked by the UPDATE below)
+        variant = get_cached_variant(frappe.local.site, variant_id, get_variant_version())
+        if not variant:
+            return {"status": "error", "message": f"Product variant {variant_id} not found."}
 
-        # Create customer if doesn't exist (reusing existing logic)
-        customer_doc = get_or_create_customer(phone_number, delivery_address)
-
-        order_doc = frappe.get_doc({
-            "doctype": "WhatsApp Order",
-            "naming_series": "WOR-.YYYY.-.#####",
-            "customer_name": customer_name,
-            "phone_number": phone_number,
-            "item": variant.product_name,  # Main product name
-            "item_code": variant.name,  # Using variant name as item_code for simplicity
-            "variant_id": variant.name,  # Link to the variant
-            "variant_name": variant.variant_name,
-            "quantity": quantity,
-            "unit_price": variant.unit_price,
-            "currency": variant.currency,
-            "total_price": variant.unit_price * quantity,
-            "delivery_address": delivery_address,
-            "order_status": "Pending",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        })
+        now = now_datetime()
+        
+        # Reserve the stock first; the WHERE clause makes the check and the decrement one step,
+        # so concurrent orders can't oversell
+        frappe.db.savepoint("whatsapp_variant_order")
+        frappe.db.sql("""
+            UPDATE `tabWhatsApp Product Variant`
+            SET stock_quantity = stock_quantity - %(quantity)s, modified = %(now)s
+            WHERE name = %(variant)s AND is_available = 1 AND stock_quantity >= %(quantity)s
+        """, {"quantity": quantity, "now": now, "variant": variant.name})
+        
+        if not frappe.db._cursor.rowcount:
+            # Read the live row only on this failure path, to say why
+            stock = frappe.db.get_value("WhatsApp Product Variant", variant.name,
+                ["is_available", "stock_quantity"], as_dict=True)
+            if not stock or not stock.is_available:
+                return {"status": "error", "message": f"Variant {variant_id} is currently not available."}
+            return {"status": "error", "message": f"Insufficient stock for {variant_id}. Available: {stock.stock_quantity}"}
         
-        order_doc.insert(ignore_permissions=True)
-
-        # Update stock (decrement)
-        variant.stock_quantity -= quantity
-        variant.save(ignore_permissions=True)
+        try:
+            # Create customer if doesn't exist (reusing existing logic)
+            customer_doc = get_or_create_customer(phone_number, delivery_address)
+            
+            order_doc = make_variant_order(customer_name, phone_number, variant, quantity, delivery_address)
+            order_doc.insert(ignore_permissions=True)
+        except Exception:
+            # Give the reserved stock back
+            frappe.db.rollback(save_point="whatsapp_variant_order")
+            raise
 
         return {
             "status": "success",
@@ -1223,12 +1650,138 @@ def create_order_with_variant(customer_name, phone_number, variant_id, quantity,
             "currency": order_doc.currency
         }
 
-    except frappe.DoesNotExistError:
-        return {"status": "error", "message": f"Product variant {variant_id} not found."}
     except Exception as e:
-        frappe.logger().error(f"Error creating order with variant: {str(e)}")
+        logger.error(f"Error creating order with variant: {str(e)}")
         return {"status": "error", "message": f"Failed to create order with variant: {str(e)}"}
 
+def parse_quantity(quantity):
+    """Quantity from a request as a positive int, or None if it isn't one"""
+    try:
+        quantity = int(quantity)
+    except (TypeError, ValueError):
+        return None
+    return quantity if quantity > 0 else None
+
+def make_variant_order(customer_name, phone_number, variant, quantity, delivery_address):
+    """New (unsaved) WhatsApp Order for a quantity of a product variant"""
+    return frappe.get_doc({
+        "doctype": "WhatsApp Order",
+        "naming_series": "WOR-.YYYY.-.#####",
+        "customer_name": customer_name,
+        "phone_number": phone_number,
+        "item": variant.product_name,  # Main product name
+        "item_code": variant.name,  # Using variant name as item_code for simplicity
+        "variant_id": variant.name,  # Link to the variant
+        "variant_name": variant.variant_name,
+        "quantity": quantity,
+        "unit_price": variant.unit_price,
+        "currency": variant.currency,
+        "total_price": variant.unit_price * quantity,
+        "delivery_address": delivery_address,
+        "order_status": "Pending"
+    })
+
+@frappe.whitelist(allow_guest=True)
+def create_orders_bulk(orders):
+    """
+    Create several WhatsApp Orders with product variants in one call; either all are placed or none.
+    Usage: POST /api/method/whatsapp_integration.api.create_orders_bulk
+    Payload: {
+        "orders": [
+            {"customer_name": "John Doe", "phone_number": "254712345678", "variant_id": "Pizza Margherita - Large",
+             "quantity": 2, "delivery_address": "123 Main Street"},
+            ...
+        ]
+    }
+    """
+    try:
+        orders = frappe.parse_json(orders) if isinstance(orders, str) else orders
+        if not orders or not isinstance(orders, list):
+            return {"status": "error", "message": "Please provide a non-empty list of orders."}
+        
+        required = ("customer_name", "phone_number", "variant_id", "quantity", "delivery_address")
+        quantity_by_variant = defaultdict(int)
+        for i, order in enumerate(orders, 1):
+            if not isinstance(order, dict) or not all(order.get(field) for field in required):
+                return {"status": "error", "message": f"Order {i}: all fields (customer_name, phone_number, variant_id, quantity, delivery_address) are required."}
+            order["quantity"] = parse_quantity(order["quantity"])
+            if not order["quantity"]:
+                return {"status": "error", "message": f"Order {i}: quantity must be a positive integer."}
+            quantity_by_variant[order["variant_id"]] += order["quantity"]
+        
+        # All variants in one query
+        variants = {
+            v.name: v for v in frappe.get_all("WhatsApp Product Variant",
+                filters=[["name", "in", list(quantity_by_variant)]],
+                fields=["name", "product_name", "variant_name", "unit_price", "currency", "stock_quantity", "is_available"]
+            )
+        }
+        for variant_id, quantity in quantity_by_variant.items():
+            variant = variants.get(variant_id)
+            if not variant:
+                return {"status": "error", "message": f"Product variant {variant_id} not found."}
+            if not variant.is_available:
+                return {"status": "error", "message": f"Variant {variant_id} is currently not available."}
+            if variant.stock_quantity < quantity:
+                return {"status": "error", "message": f"Insufficient stock for {variant_id}. Available: {variant.stock_quantity}"}
+        
+        now = now_datetime()
+        
+        # Reserve the stock for every variant in one conditional UPDATE; it only counts as
+        # reserved if every variant row was updated
+        values = {"now": now}
+        cases = []
+        for i, (variant_id, quantity) in enumerate(quantity_by_variant.items()):
+            values[f"variant_{i}"] = variant_id
+            values[f"quantity_{i}"] = quantity
+            cases.append(f"WHEN %(variant_{i})s THEN %(quantity_{i})s")
+        quantity_case = f"CASE name {' '.join(cases)} END"
+        names = ", ".join(f"%(variant_{i})s" for i in range(len(cases)))
+        
+        frappe.db.savepoint("whatsapp_bulk_orders")
+        frappe.db.sql(f"""
+            UPDATE `tabWhatsApp Product Variant`
+            SET stock_quantity = stock_quantity - {quantity_case}, modified = %(now)s
+            WHERE name IN ({names}) AND is_available = 1 AND stock_quantity >= {quantity_case}
+        """, values)
+        
+        if frappe.db._cursor.rowcount != len(quantity_by_variant):
+            frappe.db.rollback(save_point="whatsapp_bulk_orders")
+            return {"status": "error", "message": "Insufficient stock for one or more variants."}
+        
+        try:
+            created = []
+            for order in orders:
+                get_or_create_customer(order["phone_number"], order["delivery_address"])
+                order_doc = make_variant_order(order["customer_name"], order["phone_number"], variants[order["variant_id"]],
+                    order["quantity"], order["delivery_address"])
+                order_doc.insert(ignore_permissions=True)
+                created.append({
+                    "order_id": order_doc.name,
+                    "total_price": order_doc.total_price,
+                    "currency": order_doc.currency
+                })
+            
+            frappe.db.commit()
+        except Exception:
+            # Give the reserved stock back and drop any orders already inserted
+            frappe.db.rollback(save_point="whatsapp_bulk_orders")
+            # Customers created inside the rolled back block must not stay cached
+            for phone_number in {order["phone_number"] for order in orders}:
+                frappe.cache().hdel(CUSTOMER_CACHE_KEY, phone_number)
+            raise
+        
+        return {
+            "status": "success",
+            "message": f"{len(created)} orders placed successfully.",
+            "orders": created,
+            "total_created": len(created)
+        }
+    
+    except Exception as e:
+        logger.error(f"Error creating orders in bulk: {str(e)}")
+        return {"status": "error", "message": f"Failed to create orders: {str(e)}"}
+
 @frappe.whitelist(allow_guest=True)
 def get_order_with_pricing(order_id):
     """
@@ -1239,7 +1792,13 @@ def get_order_with_pricing(order_id):
         if not order_id:
             return {"status": "error", "message": "Please provide order_id parameter."}
         
-        order = frappe.get_doc("WhatsApp Order", order_id)
+        order = frappe.db.get_value("WhatsApp Order", order_id,
+            ["name", "customer_name", "phone_number", "item", "variant_name", "quantity", "unit_price",
+             "currency", "total_price", "delivery_address", "order_status", "creation", "modified"],
+            as_dict=True
+        )
+        if not order:
+            return {"status": "error", "message": f"Order {order_id} not found."}
         
         return {
             "status": "success",
@@ -1259,8 +1818,6 @@ def get_order_with_pricing(order_id):
                 "updated_at": order.modified
             }
         }
-    except frappe.DoesNotExistError:
-        return {"status": "error", "message": f"Order {order_id} not found."}
     except Exception as e:
-        frappe.logger().error(f"Error getting order with pricing: {str(e)}")
+        logger.error(f"Error getting order with pricing: {str(e)}")
         return {"status": "error", "message": f"Failed to get order with pricing: {str(e)}"}
@@ -5,7 +5,8 @@ This version simulates WhatsApp messages for easy testing
 
 import frappe
 import json
-from datetime import datetime
+from whatsapp_integration.utils import insert_order_row
+from whatsapp_integration.whatsapp_integration.api import format_menu_lines, get_available_items
 
 @frappe.whitelist(allow_guest=True)
 def test_order():
@@ -25,21 +26,16 @@ def test_order():
         delivery_address = data.get("delivery_address", "123 Test Street")
         
         # Create the order
-        order_doc = frappe.get_doc({
-            "doctype": "WhatsApp Order",
+        order_doc = insert_order_row({
             "naming_series": "WOR-.YYYY.-.#####",
             "customer_name": customer_name,
             "phone_number": phone_number,
             "item": item,
             "quantity": quantity,
             "delivery_address": delivery_address,
-            "order_status": "Pending",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
+            "order_status": "Pending"
         })
         
-        order_doc.insert(ignore_permissions=True)
-        
         return {
             "status": "success",
             "message": f"Order {order_doc.name} created successfully!",
@@ -98,21 +94,16 @@ def simulate_whatsapp_conversation():
         ]
         
         # Create the order as if user confirmed
-        order_doc = frappe.get_doc({
-            "doctype": "WhatsApp Order",
+        order_doc = insert_order_row({
             "naming_series": "WOR-.YYYY.-.#####",
             "customer_name": "Simulated Customer",
             "phone_number": "254700000000",
             "item": "Pizza",
             "quantity": 2,
             "delivery_address": "123 Main Street, Nairobi",
-            "order_status": "Pending",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
+            "order_status": "Pending"
         })
         
-        order_doc.insert(ignore_permissions=True)
-        
         conversation_steps.append(f"Bot: ✅ Order placed successfully!")
         conversation_steps.append(f"Bot: Order Number: {order_doc.name}")
         conversation_steps.append("Bot: Estimated delivery: 30 minutes")
@@ -139,17 +130,9 @@ def get_menu():
     Usage: GET /api/method/whatsapp_integration.api_simple.get_menu
     """
     try:
-        items = frappe.db.sql("""
-            SELECT name as item_code, item_name, standard_rate, description
-            FROM `tabItem` 
-            WHERE disabled = 0 AND is_sales_item = 1 
-            ORDER BY item_name 
-            LIMIT 10
-        """, as_dict=True)
-        
-        menu_text = "🍕 Available Items:\n\n"
-        for i, item in enumerate(items, 1):
-            menu_text += f"{i}. {item.get('item_name')} - ${item.get('standard_rate', 0)}\n"
+        # Same cached item list and menu lines as the WhatsApp flow
+        items = get_available_items()
+        menu_text = "🍕 Available Items:\n\n" + format_menu_lines(items)
         
         return {
             "status": "success",
@@ -162,4 +145,4 @@ def get_menu():
         return {
             "status": "error",
             "message": f"Failed to fetch menu: {str(e)}"
-        }
\ No newline at end of file
+        }
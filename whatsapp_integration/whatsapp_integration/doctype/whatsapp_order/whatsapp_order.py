@@ -3,17 +3,10 @@
 
 import frappe
 from frappe.model.document import Document
-from datetime import datetime
+from whatsapp_integration.utils import valid_phone
 
 class WhatsAppOrder(Document):
     def before_save(self):
-        # Set created_at timestamp if not set
-        if not self.created_at:
-            self.created_at = datetime.now()
-
-        # Always update the updated_at timestamp
-        self.updated_at = datetime.now()
-
         # Calculate total_price if unit_price and quantity are available
         if self.unit_price and self.quantity:
             self.total_price = self.unit_price * self.quantity
@@ -27,11 +20,8 @@ class WhatsAppOrder(Document):
 
     def validate(self):
         # Validate phone number format (basic validation)
-        if self.phone_number:
-            # Remove any non-digit characters for validation
-            phone_digits = ''.join(filter(str.isdigit, self.phone_number))
-            if len(phone_digits) < 10:
-                frappe.throw("Please enter a valid phone number")
+        if self.phone_number and not valid_phone(self.phone_number):
+            frappe.throw("Please enter a valid phone number")
 
         # Validate quantity
         if self.quantity and self.quantity <= 0: